@@ -0,0 +1,101 @@
+"""Benchmark de démarrage à froid : data.json vs snapshot binaire.
+
+Génère un jeu de données synthétique à partir des enregistrements de data.json,
+l'écrit aux deux formats puis mesure, dans des processus Python neufs, le temps
+nécessaire pour être prêt à servir une requête GET /stock/<sku>.
+
+    python benchmark_snapshot.py --rows 100000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from erp_snapshot import write_snapshot
+
+JSON_STARTUP = """
+import json, time
+start = time.perf_counter()
+with open({path!r}, "r", encoding="utf-8") as f:
+    data = json.load(f)
+item = next(i for i in data["stock"] if i.get("sku") == {sku!r})
+print(time.perf_counter() - start)
+"""
+
+SNAPSHOT_STARTUP = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from erp_snapshot import open_snapshot
+with open_snapshot({path!r}) as snapshot:
+    item = snapshot.table("stock").get({sku!r})
+print(time.perf_counter() - start)
+"""
+
+
+def build_dataset(template, rows):
+    """Duplique les enregistrements de data.json jusqu'à obtenir `rows` lignes par table"""
+    data = {}
+    for name, records in template.items():
+        if not records:
+            data[name] = []
+            continue
+        generated = []
+        for i in range(rows):
+            record = dict(records[i % len(records)])
+            if name == "stock":
+                record["id"] = i + 1
+                record["sku"] = f"SKU{i:07d}"
+            else:
+                record["id"] = f"{name[:3].upper()}{i:07d}"
+            generated.append(record)
+        data[name] = generated
+    return data
+
+
+def measure(script, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        timings.append(float(output.stdout.strip()))
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare cold-start times of data.json and the binary snapshot")
+    parser.add_argument("--data", default="data.json", help="Template dataset (default: data.json)")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows generated per table")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per format")
+    args = parser.parse_args(argv)
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    data = build_dataset(template, args.rows)
+    sku = data["stock"][-1]["sku"]
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "data.json")
+        snapshot_path = os.path.join(tmp, "data.snap")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        write_snapshot(data, snapshot_path)
+
+        json_time = measure(JSON_STARTUP.format(path=json_path, sku=sku), args.runs)
+        snapshot_time = measure(
+            SNAPSHOT_STARTUP.format(root=root, path=snapshot_path, sku=sku), args.runs
+        )
+
+        print(f"Rows per table: {args.rows}")
+        print(f"data.json : {os.path.getsize(json_path) / 1e6:8.2f} MB  {json_time * 1000:9.2f} ms")
+        print(f"data.snap : {os.path.getsize(snapshot_path) / 1e6:8.2f} MB  {snapshot_time * 1000:9.2f} ms")
+        print(f"Speedup   : {json_time / snapshot_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import json
+import os
 import uuid
 from datetime import datetime
 import logging
+from erp_snapshot import SnapshotError, open_snapshot, write_snapshot
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -12,8 +14,21 @@ logger = logging.getLogger("ERPServer")
 app = Flask(__name__)
 CORS(app)  # Permet les requêtes cross-origin depuis n8n
 
+# Snapshot binaire optionnel (voir erp_snapshot.py) utilisé à la place de data.json
+SNAPSHOT_FILE = os.environ.get("ERP_SNAPSHOT_FILE")
+
 # Chargement des données de fichier JSON
 def load_data():
+    if SNAPSHOT_FILE:
+        try:
+            with open_snapshot(SNAPSHOT_FILE) as snapshot:
+                return snapshot.to_dict()
+        except FileNotFoundError:
+            logger.error(f"{SNAPSHOT_FILE} file not found.")
+            return {"stock": [], "orders": [], "purchase_orders": []}
+        except SnapshotError as e:
+            logger.error(f"Snapshot format error in {SNAPSHOT_FILE}: {e}")
+            return {"stock": [], "orders": [], "purchase_orders": []}
     try:
         with open("data.json", "r", encoding="utf-8") as f:
             return json.load(f)
@@ -26,6 +41,9 @@ def load_data():
 
 def save_data(data):
     try:
+        if SNAPSHOT_FILE:
+            write_snapshot(data, SNAPSHOT_FILE)
+            return True
         with open("data.json", "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4)
         return True
@@ -33,6 +51,46 @@ def save_data(data):
         logger.error(f"Error saving data: {e}")
         return False
 
+# Lecture d'une seule table : avec le snapshot, seules ses lignes sont décodées
+def load_table(name):
+    if not SNAPSHOT_FILE:
+        return load_data().get(name, [])
+    try:
+        with open_snapshot(SNAPSHOT_FILE) as snapshot:
+            table = snapshot.table(name)
+            return table.to_list() if table is not None else []
+    except FileNotFoundError:
+        logger.error(f"{SNAPSHOT_FILE} file not found.")
+        return []
+    except SnapshotError as e:
+        logger.error(f"Snapshot format error in {SNAPSHOT_FILE}: {e}")
+        return []
+
+# Recherche d'un enregistrement par clé : avec le snapshot, via l'index embarqué
+def find_record(name, key_field, key):
+    if not SNAPSHOT_FILE:
+        for record in load_data().get(name, []):
+            if record.get(key_field) == key:
+                return record
+        return None
+    try:
+        with open_snapshot(SNAPSHOT_FILE) as snapshot:
+            table = snapshot.table(name)
+            if table is None:
+                return None
+            if table.key == key_field:
+                return table.get(key)
+            for record in table:
+                if record.get(key_field) == key:
+                    return record
+            return None
+    except FileNotFoundError:
+        logger.error(f"{SNAPSHOT_FILE} file not found.")
+        return None
+    except SnapshotError as e:
+        logger.error(f"Snapshot format error in {SNAPSHOT_FILE}: {e}")
+        return None
+
 # Middleware pour logger toutes les requêtes
 @app.before_request
 def log_request():
@@ -61,11 +119,11 @@ def internal_error(error):
 @app.route('/stock', methods=['GET'])
 def get_stock():
     try:
-        data = load_data()
+        records = load_table("stock")
         return jsonify({
             "success": True,
-            "data": data.get("stock", []),
-            "count": len(data.get("stock", [])),
+            "data": records,
+            "count": len(records),
             "timestamp": datetime.now().isoformat() + "Z"
         })
     except Exception as e:
@@ -78,16 +136,13 @@ def get_stock():
 @app.route('/stock/<sku>', methods=['GET'])
 def get_stock_item(sku):
     try:
-        data = load_data()
-        stock_items = data.get("stock", [])
-        
-        for item in stock_items:
-            if item.get("sku") == sku:
-                return jsonify({
-                    "success": True,
-                    "data": item,
-                    "timestamp": datetime.now().isoformat() + "Z"
-                })
+        item = find_record("stock", "sku", sku)
+        if item is not None:
+            return jsonify({
+                "success": True,
+                "data": item,
+                "timestamp": datetime.now().isoformat() + "Z"
+            })
         
         return jsonify({
             "success": False,
@@ -147,11 +202,11 @@ def update_stock(sku):
 @app.route('/orders', methods=['GET'])
 def get_orders():
     try:
-        data = load_data()
+        records = load_table("orders")
         return jsonify({
             "success": True,
-            "data": data.get("orders", []),
-            "count": len(data.get("orders", [])),
+            "data": records,
+            "count": len(records),
             "timestamp": datetime.now().isoformat() + "Z"
         })
     except Exception as e:
@@ -164,16 +219,13 @@ def get_orders():
 @app.route('/orders/<order_id>', methods=['GET'])
 def get_order(order_id):
     try:
-        data = load_data()
-        orders = data.get("orders", [])
-        
-        for order in orders:
-            if order.get("id") == order_id:
-                return jsonify({
-                    "success": True,
-                    "data": order,
-                    "timestamp": datetime.now().isoformat() + "Z"
-                })
+        order = find_record("orders", "id", order_id)
+        if order is not None:
+            return jsonify({
+                "success": True,
+                "data": order,
+                "timestamp": datetime.now().isoformat() + "Z"
+            })
         
         return jsonify({
             "success": False,
@@ -231,11 +283,11 @@ def update_order(order_id):
 @app.route('/purchase-orders', methods=['GET'])
 def get_purchase_orders():
     try:
-        data = load_data()
+        records = load_table("purchase_orders")
         return jsonify({
             "success": True,
-            "data": data.get("purchase_orders", []),
-            "count": len(data.get("purchase_orders", [])),
+            "data": records,
+            "count": len(records),
             "timestamp": datetime.now().isoformat() + "Z"
         })
     except Exception as e:
@@ -254,16 +306,13 @@ def get_purchase_orders_alt():
 @app.route('/purchase-orders/<po_id>', methods=['GET'])
 def get_purchase_order(po_id):
     try:
-        data = load_data()
-        purchase_orders = data.get("purchase_orders", [])
-        
-        for po in purchase_orders:
-            if po.get("id") == po_id:
-                return jsonify({
-                    "success": True,
-                    "data": po,
-                    "timestamp": datetime.now().isoformat() + "Z"
-                })
+        po = find_record("purchase_orders", "id", po_id)
+        if po is not None:
+            return jsonify({
+                "success": True,
+                "data": po,
+                "timestamp": datetime.now().isoformat() + "Z"
+            })
         
         return jsonify({
             "success": False,
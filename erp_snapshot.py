@@ -0,0 +1,498 @@
+"""Format de snapshot binaire pour les données de l'ERP.
+
+Alternative à data.json : un fichier binaire versionné, ouvert via mmap, dont
+les lignes sont décodées à la demande au lieu de parser tout le JSON au
+démarrage.
+
+Structure du fichier (little-endian) :
+
+    en-tête   : magic (8 octets) | version (u16) | flags (u16) | taille catalogue (u32)
+    catalogue : JSON compact décrivant chaque table (champs, largeurs, offsets)
+    tables    : pour chaque table, les enregistrements à largeur fixe, le tas des
+                chaînes, puis l'index trié (clé à largeur fixe + numéro de ligne u32)
+
+Chaque enregistrement commence par deux bitmaps (champ présent / champ null)
+suivis des champs : entiers en int64, flottants en float64, booléens sur un
+octet. Les chaînes UTF-8 sont rangées dans le tas de la table et référencées
+par (offset u32, longueur u32), si bien qu'une valeur longue n'élargit pas les
+autres lignes. Les valeurs d'un autre type (listes, objets, colonnes mixtes)
+sont stockées dans le tas comme du texte JSON.
+
+Utilisation en ligne de commande :
+
+    python erp_snapshot.py export data.json data.snap
+    python erp_snapshot.py import data.snap data.json
+    python erp_snapshot.py info data.snap
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+MAGIC = b"ERPSNAP\x00"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHHI")
+_ALIGN = 8
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+_MAX_HEAP_SIZE = 0xFFFFFFFF
+_REPLACE_ATTEMPTS = 10
+_REPLACE_DELAY = 0.05
+
+# Champ indexé pour chaque table connue ; les autres tables utilisent "id"
+INDEX_KEYS = {
+    "stock": "sku",
+    "orders": "id",
+    "purchase_orders": "id",
+}
+
+
+class SnapshotError(ValueError):
+    """Fichier snapshot invalide ou de version non supportée"""
+
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _infer_kind(values):
+    """Déduit le type de stockage d'une colonne à partir de ses valeurs non nulles"""
+    if not values:
+        return "s"
+    if all(isinstance(v, bool) for v in values):
+        return "b"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        if all(_INT64_MIN <= v <= _INT64_MAX for v in values):
+            return "i"
+        return "j"
+    if all(isinstance(v, float) for v in values):
+        return "f"
+    if all(isinstance(v, str) for v in values):
+        return "s"
+    return "j"
+
+
+def _encode_text(kind, value):
+    if kind == "s":
+        return value.encode("utf-8")
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _record_struct(fields):
+    """Construit le struct d'un enregistrement : bitmaps puis champs à largeur fixe
+
+    Les chaînes et valeurs JSON sont représentées par (offset, longueur) dans le tas.
+    """
+    mask_size = (len(fields) + 7) // 8
+    fmt = f"<{mask_size}s{mask_size}s"
+    for _, kind in fields:
+        if kind == "i":
+            fmt += "q"
+        elif kind == "f":
+            fmt += "d"
+        elif kind == "b":
+            fmt += "?"
+        else:
+            fmt += "II"
+    return struct.Struct(fmt)
+
+
+def _encode_key(value):
+    """Clé d'index préfixée par son type : 2 et "2" ne se confondent pas"""
+    if isinstance(value, (int, float)):
+        # True, 1 et 1.0 sont égaux en Python, ils partagent donc la même clé
+        if isinstance(value, bool) or (isinstance(value, float) and value.is_integer()):
+            value = int(value)
+        return b"n" + repr(value).encode("ascii")
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8")
+    return b"j" + json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _index_struct(width):
+    return struct.Struct(f"<{width}sI")
+
+
+def _build_table(name, records):
+    """Sérialise une table ; renvoie (description catalogue, lignes, tas, index)"""
+    field_names = []
+    for record in records:
+        for key in record:
+            if key not in field_names:
+                field_names.append(key)
+
+    fields = []
+    for field in field_names:
+        values = [r[field] for r in records if r.get(field) is not None]
+        fields.append((field, _infer_kind(values)))
+
+    record_struct = _record_struct(fields)
+    mask_size = (len(fields) + 7) // 8
+    rows = bytearray()
+    heap = bytearray()
+    for record in records:
+        present = bytearray(mask_size)
+        nulls = bytearray(mask_size)
+        values = []
+        for i, (field, kind) in enumerate(fields):
+            value = record.get(field)
+            if field in record:
+                present[i // 8] |= 1 << (i % 8)
+            if value is None:
+                if field in record:
+                    nulls[i // 8] |= 1 << (i % 8)
+                if kind in ("s", "j"):
+                    values.extend((0, 0))
+                elif kind == "b":
+                    values.append(False)
+                else:
+                    values.append(0)
+            elif kind in ("s", "j"):
+                encoded = _encode_text(kind, value)
+                values.extend((len(heap), len(encoded)))
+                heap += encoded
+                if len(heap) > _MAX_HEAP_SIZE:
+                    raise SnapshotError(
+                        f"Table {name} holds more than 4 GiB of text, which the snapshot format cannot store"
+                    )
+            else:
+                values.append(value)
+        rows += record_struct.pack(bytes(present), bytes(nulls), *values)
+
+    key_field = INDEX_KEYS.get(name, "id")
+    entries = sorted(
+        (_encode_key(record[key_field]), row)
+        for row, record in enumerate(records)
+        if record.get(key_field) is not None
+    )
+    index_width = max((len(key) for key, _ in entries), default=0)
+    index_struct = _index_struct(index_width)
+    index = b"".join(index_struct.pack(key, row) for key, row in entries)
+
+    table = {
+        "name": name,
+        "key": key_field,
+        "fields": [list(f) for f in fields],
+        "count": len(records),
+        "record_size": record_struct.size,
+        "heap_size": len(heap),
+        "index_width": index_width,
+        "index_count": len(entries),
+    }
+    return table, bytes(rows), bytes(heap), index
+
+
+def write_snapshot(data, path):
+    """Écrit les données (format data.json) dans un snapshot binaire"""
+    tables = []
+    meta = {}
+    for name, value in data.items():
+        if isinstance(value, list) and all(isinstance(r, dict) for r in value):
+            tables.append(_build_table(name, value))
+        else:
+            meta[name] = value
+
+    # Les offsets dépendent de la taille du catalogue, qui dépend des offsets :
+    # on itère jusqu'à ce que la taille se stabilise
+    catalog_size = 0
+    while True:
+        offset = _align(_HEADER.size + catalog_size)
+        entries = []
+        for table, rows, heap, index in tables:
+            entry = dict(table, rows_offset=offset)
+            offset = _align(offset + len(rows))
+            entry["heap_offset"] = offset
+            offset = _align(offset + len(heap))
+            entry["index_offset"] = offset
+            offset = _align(offset + len(index))
+            entries.append(entry)
+        catalog = json.dumps(
+            {"tables": entries, "meta": meta, "order": list(data)}, separators=(",", ":")
+        ).encode("utf-8")
+        if len(catalog) == catalog_size:
+            break
+        catalog_size = len(catalog)
+
+    # Fichier temporaire unique : deux écritures concurrentes ne partagent jamais le même inode
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or "."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(catalog)))
+            f.write(catalog)
+            for entry, (_, rows, heap, index) in zip(entries, tables):
+                f.write(b"\x00" * (entry["rows_offset"] - f.tell()))
+                f.write(rows)
+                f.write(b"\x00" * (entry["heap_offset"] - f.tell()))
+                f.write(heap)
+                f.write(b"\x00" * (entry["index_offset"] - f.tell()))
+                f.write(index)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _replace(src, dst):
+    """os.replace avec quelques tentatives : sous Windows, le remplacement échoue
+    tant qu'une autre requête garde le snapshot ouvert en mmap"""
+    for attempt in range(_REPLACE_ATTEMPTS):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == _REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(_REPLACE_DELAY)
+
+
+class SnapshotTable:
+    """Vue paresseuse sur une table : les lignes sont décodées à la lecture"""
+
+    def __init__(self, buffer, entry):
+        self._buffer = buffer
+        self.name = entry["name"]
+        self.key = entry["key"]
+        self._fields = [tuple(f) for f in entry["fields"]]
+        self._count = entry["count"]
+        self._rows_offset = entry["rows_offset"]
+        self._record = _record_struct(self._fields)
+        self._record_size = entry["record_size"]
+        self._heap_offset = entry["heap_offset"]
+        self._heap_size = entry["heap_size"]
+        self._index_offset = entry["index_offset"]
+        self._index_count = entry["index_count"]
+        self._index = _index_struct(entry["index_width"])
+        self._index_width = entry["index_width"]
+
+    def validate(self, size):
+        """Vérifie que les lignes et l'index décrits par le catalogue tiennent dans le fichier"""
+        if self._count < 0 or self._index_count < 0 or self._index_width < 0:
+            raise SnapshotError(f"Invalid counts for table {self.name}")
+        if self._record.size != self._record_size:
+            raise SnapshotError(f"Record size mismatch for table {self.name}")
+        if self._rows_offset < 0 or self._rows_offset + self._count * self._record.size > size:
+            raise SnapshotError(f"Rows of table {self.name} out of bounds")
+        if self._heap_offset < 0 or self._heap_size < 0 or self._heap_offset + self._heap_size > size:
+            raise SnapshotError(f"String heap of table {self.name} out of bounds")
+        if self._index_offset < 0 or self._index_offset + self._index_count * self._index.size > size:
+            raise SnapshotError(f"Index of table {self.name} out of bounds")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError(f"Row {row} out of range for table {self.name}")
+        try:
+            return self._decode(row)
+        except (ValueError, struct.error) as e:
+            raise SnapshotError(f"Corrupted row {row} in table {self.name}: {e!r}") from e
+
+    def _decode(self, row):
+        raw = self._record.unpack_from(
+            self._buffer, self._rows_offset + row * self._record.size
+        )
+        present, nulls = raw[0], raw[1]
+        record = {}
+        pos = 2
+        for i, (field, kind) in enumerate(self._fields):
+            if kind in ("s", "j"):
+                start, length = raw[pos], raw[pos + 1]
+                if start + length > self._heap_size:
+                    raise SnapshotError(f"Invalid heap reference for field {field}")
+                start += self._heap_offset
+                value = self._buffer[start:start + length]
+                pos += 2
+            else:
+                value = raw[pos]
+                pos += 1
+            if not present[i // 8] & (1 << (i % 8)):
+                continue
+            if nulls[i // 8] & (1 << (i % 8)):
+                record[field] = None
+            elif kind == "s":
+                record[field] = value.decode("utf-8")
+            elif kind == "j":
+                record[field] = json.loads(value)
+            else:
+                record[field] = value
+        return record
+
+    def __iter__(self):
+        for row in range(self._count):
+            yield self[row]
+
+    def _index_key(self, position):
+        key, row = self._index.unpack_from(
+            self._buffer, self._index_offset + position * self._index.size
+        )
+        return key.rstrip(b"\x00"), row
+
+    def get(self, key):
+        """Recherche une ligne par sa clé via l'index trié ; None si absente.
+
+        Même résultat que la recherche linéaire sur data.json : première ligne
+        dont la clé est égale à `key`.
+        """
+        wanted = _encode_key(key)
+        if len(wanted) > self._index_width:
+            return None
+
+        low, high = 0, self._index_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_key(middle)[0] < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        # Les entrées de même clé sont triées par numéro de ligne
+        while low < self._index_count:
+            found, row = self._index_key(low)
+            if found != wanted:
+                break
+            record = self[row]
+            if record.get(self.key) == key:
+                return record
+            low += 1
+        return None
+
+    def to_list(self):
+        return list(self)
+
+
+class Snapshot:
+    """Snapshot ouvert en mmap ; à utiliser comme context manager"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = None
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _, catalog_size = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise SnapshotError(f"{path} is not an ERP snapshot")
+            if version != FORMAT_VERSION:
+                raise SnapshotError(f"Unsupported snapshot version {version} in {path}")
+            if _HEADER.size + catalog_size > len(self._mmap):
+                raise SnapshotError(f"Truncated snapshot {path}: catalog out of bounds")
+            catalog = json.loads(
+                self._mmap[_HEADER.size:_HEADER.size + catalog_size].decode("utf-8")
+            )
+            self.meta = catalog.get("meta", {})
+            self._order = catalog.get("order", [])
+            self._tables = {}
+            for entry in catalog["tables"]:
+                table = SnapshotTable(self._mmap, entry)
+                try:
+                    table.validate(len(self._mmap))
+                except SnapshotError as e:
+                    raise SnapshotError(f"Corrupted snapshot {path}: {e}") from None
+                self._tables[table.name] = table
+        except SnapshotError:
+            self.close()
+            raise
+        except (ValueError, KeyError, TypeError, AttributeError, struct.error) as e:
+            # Toute incohérence du catalogue est une corruption du fichier
+            self.close()
+            raise SnapshotError(f"Corrupted snapshot {path}: {e!r}") from e
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    @property
+    def tables(self):
+        return list(self._tables)
+
+    def table(self, name):
+        """Renvoie la table demandée, ou None si elle n'existe pas"""
+        return self._tables.get(name)
+
+    def to_dict(self):
+        """Décode tout le snapshot au format data.json"""
+        data = {}
+        # Ordre des clés d'origine, pour un aller-retour exact avec data.json
+        for name in self._order:
+            if name in self._tables:
+                data[name] = self._tables[name].to_list()
+            elif name in self.meta:
+                data[name] = self.meta[name]
+        for name, table in self._tables.items():
+            data.setdefault(name, table.to_list())
+        for name, value in self.meta.items():
+            data.setdefault(name, value)
+        return data
+
+
+def open_snapshot(path):
+    return Snapshot(path)
+
+
+def export_json(json_path, snapshot_path):
+    """data.json -> snapshot binaire"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    write_snapshot(data, snapshot_path)
+
+
+def import_snapshot(snapshot_path, json_path):
+    """Snapshot binaire -> data.json"""
+    with open_snapshot(snapshot_path) as snapshot:
+        data = snapshot.to_dict()
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ERP binary snapshot tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Convert data.json to a snapshot")
+    export_parser.add_argument("json_path")
+    export_parser.add_argument("snapshot_path")
+
+    import_parser = subparsers.add_parser("import", help="Convert a snapshot back to data.json")
+    import_parser.add_argument("snapshot_path")
+    import_parser.add_argument("json_path")
+
+    info_parser = subparsers.add_parser("info", help="Describe a snapshot")
+    info_parser.add_argument("snapshot_path")
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        export_json(args.json_path, args.snapshot_path)
+        print(f"Snapshot written to {args.snapshot_path}")
+    elif args.command == "import":
+        import_snapshot(args.snapshot_path, args.json_path)
+        print(f"Data written to {args.json_path}")
+    else:
+        with open_snapshot(args.snapshot_path) as snapshot:
+            print(f"Snapshot version {FORMAT_VERSION}")
+            for name in snapshot.tables:
+                table = snapshot.table(name)
+                print(f"  {name}: {len(table)} rows, indexed on '{table.key}'")
+
+
+if __name__ == "__main__":
+    main()
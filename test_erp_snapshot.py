@@ -0,0 +1,142 @@
+import json
+import os
+import struct
+import tempfile
+import unittest
+
+from erp_snapshot import (
+    FORMAT_VERSION,
+    MAGIC,
+    SnapshotError,
+    export_json,
+    import_snapshot,
+    open_snapshot,
+    write_snapshot,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.path = os.path.join(self.tmp, "data.snap")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def roundtrip(self, data):
+        write_snapshot(data, self.path)
+        with open_snapshot(self.path) as snapshot:
+            return snapshot.to_dict()
+
+    def write_raw(self, content):
+        with open(self.path, "wb") as f:
+            f.write(content)
+
+
+class RoundTripTests(SnapshotTestCase):
+    def test_data_json_export_import(self):
+        json_path = os.path.join(HERE, "data.json")
+        out_path = os.path.join(self.tmp, "data.json")
+        export_json(json_path, self.path)
+        import_snapshot(self.path, out_path)
+        with open(json_path, "r", encoding="utf-8") as f:
+            original = json.load(f)
+        with open(out_path, "r", encoding="utf-8") as f:
+            restored = json.load(f)
+        self.assertEqual(restored, original)
+        self.assertEqual(list(restored), list(original))
+
+    def test_edge_values(self):
+        data = {
+            "stock": [
+                {"id": 1, "sku": "SKU1", "price": 2, "big": 2 ** 70, "note": "entrepôt ✓"},
+                {"id": 2, "sku": "SKU2", "price": 2.5, "big": 1, "note": None},
+                {"id": 3, "sku": "SKU3", "tags": ["a", {"b": None}], "flag": True},
+            ],
+            "orders": [],
+            "cfg": {"currency": "EUR"},
+            "purchase_orders": [{"id": "PO1", "comment": "x" * 200000}],
+        }
+        restored = self.roundtrip(data)
+        self.assertEqual(restored, data)
+        self.assertEqual(list(restored), list(data))
+        self.assertIsInstance(restored["stock"][0]["price"], int)
+        self.assertIsInstance(restored["stock"][1]["price"], float)
+        self.assertIn("note", restored["stock"][1])
+        self.assertNotIn("note", restored["stock"][2])
+
+
+class LookupTests(SnapshotTestCase):
+    def setUp(self):
+        super().setUp()
+        self.records = [
+            {"id": 2, "v": "int"},
+            {"id": "2", "v": "str"},
+            {"id": "A", "v": "first"},
+            {"id": "A", "v": "duplicate"},
+            {"v": "no key"},
+        ]
+        write_snapshot({"stock": [{"sku": "SKU123", "qty": 1}], "orders": self.records}, self.path)
+
+    def test_hits(self):
+        with open_snapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.table("stock").get("SKU123"), {"sku": "SKU123", "qty": 1})
+            orders = snapshot.table("orders")
+            self.assertEqual(orders.get(2)["v"], "int")
+            self.assertEqual(orders.get("2")["v"], "str")
+            self.assertEqual(orders.get("A")["v"], "first")
+
+    def test_misses(self):
+        with open_snapshot(self.path) as snapshot:
+            self.assertIsNone(snapshot.table("stock").get("SKU999"))
+            self.assertIsNone(snapshot.table("stock").get(123))
+            self.assertIsNone(snapshot.table("orders").get("B"))
+            self.assertIsNone(snapshot.table("missing"))
+
+    def test_lazy_rows(self):
+        with open_snapshot(self.path) as snapshot:
+            orders = snapshot.table("orders")
+            self.assertEqual(len(orders), len(self.records))
+            self.assertEqual(orders[-1], self.records[-1])
+            with self.assertRaises(IndexError):
+                orders[len(self.records)]
+
+
+class CorruptionTests(SnapshotTestCase):
+    def assertCorrupted(self):
+        with self.assertRaises(SnapshotError):
+            with open_snapshot(self.path) as snapshot:
+                snapshot.to_dict()
+
+    def test_bad_magic(self):
+        self.write_raw(b"NOTASNAP" + b"\x00" * 32)
+        self.assertCorrupted()
+
+    def test_bad_version(self):
+        catalog = json.dumps({"tables": [], "meta": {}}).encode("utf-8")
+        self.write_raw(struct.pack("<8sHHI", MAGIC, FORMAT_VERSION + 1, 0, len(catalog)) + catalog)
+        self.assertCorrupted()
+
+    def test_empty_file(self):
+        self.write_raw(b"")
+        self.assertCorrupted()
+
+    def test_truncated_file(self):
+        with open(os.path.join(HERE, "data.json"), "r", encoding="utf-8") as f:
+            write_snapshot(json.load(f), self.path)
+        with open(self.path, "rb") as f:
+            content = f.read()
+        self.write_raw(content[:len(content) // 2])
+        self.assertCorrupted()
+
+    def test_catalog_without_tables(self):
+        catalog = json.dumps({"meta": {}}).encode("utf-8")
+        self.write_raw(struct.pack("<8sHHI", MAGIC, FORMAT_VERSION, 0, len(catalog)) + catalog)
+        self.assertCorrupted()
+
+
+if __name__ == "__main__":
+    unittest.main()